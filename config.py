@@ -1,15 +1,21 @@
 # config.py
 
 import dataclasses
+from typing import IO
 
 import yaml
 from beartype import beartype
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 from model import Calendar
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class MarkdownFormatConfig:
     date_format: str
     time_format: str
@@ -25,7 +31,7 @@ class MarkdownFormatConfig:
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class VikunjaConfig:
     base_url: str
     api_token: str
@@ -38,7 +44,7 @@ class VikunjaConfig:
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class DonetickConfig:
     base_url: str
     secret_key: str
@@ -51,27 +57,33 @@ class DonetickConfig:
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class TelegramConfig:
     api_token: str
-    chat_ids: list[str | int]
+    chat_ids: frozenset[int]
     welcome_message: str | None
 
     @classmethod
     def from_dict(cls, data: dict):
+        # Normalize once here (YAML may give strings or ints) so
+        # authorization checks are plain int set lookups.
         return cls(
             api_token=data.get("api_token", ""),
-            chat_ids=data.get("chat_ids", []),
+            chat_ids=frozenset(
+                int(chat_id)
+                for chat_id in data.get("chat_ids", [])
+            ),
             welcome_message=data.get("welcome_message"),
         )
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class CrawlerConfig:
     crawl_every: int | float
     date_range: tuple[int, int]
     markdown: MarkdownFormatConfig
+    max_concurrent_syncs: int = 8
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -79,11 +91,12 @@ class CrawlerConfig:
             crawl_every=data.get("crawl_every", 300),
             date_range=tuple(data.get("date_range", [0, 6])),
             markdown=MarkdownFormatConfig.from_dict(data.get("markdown", {})),
+            max_concurrent_syncs=data.get("max_concurrent_syncs", 8),
         )
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Config:
     locale: str | None
     timezone: str
@@ -96,8 +109,8 @@ class Config:
     image_urls: dict[str, str] = dataclasses.field(default_factory=dict)
 
     @classmethod
-    def from_yaml(cls, yaml_str: str):
-        data = yaml.safe_load(yaml_str)
+    def from_yaml(cls, yaml_str: str | IO[str]):
+        data = yaml.load(yaml_str, Loader=_SafeLoader)
         locale = data.get("locale")
         timezone = data.get("timezone", "UTC") # Default to UTC if not set
         db_path = data.get("db_path", "database.db")
@@ -133,5 +146,6 @@ class Config:
 
     @classmethod
     def from_file(cls, path: str):
-        with open(path) as f:
-            return cls.from_yaml(f.read())
+        # Pass the stream directly so libyaml can read incrementally.
+        with open(path, encoding="utf-8") as f:
+            return cls.from_yaml(f)
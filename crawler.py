@@ -1,46 +1,259 @@
 # crawler.py
 
+import asyncio
+import copy
 import datetime
 import logging
+import multiprocessing
+import os
 from collections.abc import AsyncGenerator
+from concurrent.futures import ProcessPoolExecutor
 
 import aiohttp
 import icalendar
 import recurring_ical_events
 from beartype import beartype
 from dateutil.parser import isoparse
-from dateutil.relativedelta import relativedelta
 
 from config import CrawlerConfig, DonetickConfig, VikunjaConfig
-from model import Calendar, DonetickTask, VikunjaTask
+from model import (
+    Calendar,
+    CalendarCacheEntry,
+    DonetickTask,
+    VikunjaTask,
+)
 
 # Set up module-level logger
 logger = logging.getLogger(__name__)
 
+# Malformed UTC offset some iCloud exports emit, and its fix. A fixed
+# literal, so plain str scan/replace; no regex machinery needed.
+_APPLE_TZ_BAD = "TZOFFSETFROM:+5328"
+_APPLE_TZ_GOOD = "TZOFFSETFROM:+0053"
+
+
+def _outside_window(
+    event: icalendar.Event,
+    start_date: datetime.date,
+    end_date: datetime.date,
+) -> bool:
+    """Whether a non-recurring event surely misses the date window.
+
+    Recurring events (or anything ambiguous) are kept so that
+    recurrence expansion stays correct; the comparison uses a day of
+    slack on both sides to stay safe across timezones.
+    """
+    if (
+        "RRULE" in event
+        or "RDATE" in event
+        or "RECURRENCE-ID" in event
+    ):
+        return False
+    dtstart = event.get("DTSTART")
+    if dtstart is None:
+        return False
+    start = dtstart.dt
+    if isinstance(start, datetime.datetime):
+        start = start.date()
+    elif not isinstance(start, datetime.date):
+        return False
+    end = start
+    dtend = event.get("DTEND")
+    if dtend is not None:
+        if isinstance(dtend.dt, datetime.datetime):
+            end = dtend.dt.date()
+        elif isinstance(dtend.dt, datetime.date):
+            end = dtend.dt
+    slack = datetime.timedelta(days=1)
+    return end < start_date - slack or start > end_date + slack
+
+
+def _has_recurrence(ical: icalendar.Calendar) -> bool:
+    return any(
+        "RRULE" in c or "RDATE" in c or "RECURRENCE-ID" in c
+        for c in ical.walk("VEVENT")
+    )
+
+
+def _iter_plain_events(
+    ical: icalendar.Calendar,
+    start_date: datetime.date,
+    end_date: datetime.date,
+):
+    """Yield non-recurring events intersecting the date window.
+
+    Mirrors recurring_ical_events.between: the window is half-open
+    at end_date midnight, compared against each event's own wall
+    clock, and a DTEND is filled in on yielded events that lack one.
+    """
+    start_w = datetime.datetime.combine(start_date, datetime.time.min)
+    end_w = datetime.datetime.combine(end_date, datetime.time.min)
+
+    for event in ical.walk("VEVENT"):
+        dtstart = event.get("DTSTART")
+        if dtstart is None:
+            continue
+        start = dtstart.dt
+        all_day = not isinstance(start, datetime.datetime)
+        if all_day:
+            start = datetime.datetime.combine(
+                start, datetime.time.min
+            )
+
+        dtend = event.get("DTEND")
+        if dtend is not None:
+            end = dtend.dt
+            if not isinstance(end, datetime.datetime):
+                end = datetime.datetime.combine(
+                    end, datetime.time.min
+                )
+        elif "DURATION" in event:
+            end = start + event["DURATION"].dt
+        elif all_day:
+            end = start + datetime.timedelta(days=1)
+        else:
+            end = start
+
+        start_naive = start.replace(tzinfo=None)
+        end_naive = end.replace(tzinfo=None)
+        if not (
+            start_naive < end_w
+            and (end_naive > start_w or start_naive >= start_w)
+        ):
+            continue
+
+        if dtend is None:
+            event = copy.copy(event)
+            event["DTEND"] = icalendar.vDDDTypes(
+                end.date() if all_day else end
+            )
+        yield event
+
+
+def _expand_ics(
+    content: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+) -> list[icalendar.Event]:
+    """Parse and expand one ICS body for the given window.
+
+    Pure CPU work with picklable inputs and outputs, so it can run
+    in a worker process off the event loop.
+    """
+    ical = icalendar.Calendar.from_ical(content)
+    # Drop events that cannot intersect the window so the
+    # recurrence expansion below has less to chew on.
+    ical.subcomponents = [
+        c
+        for c in ical.subcomponents
+        if not (
+            isinstance(c, icalendar.Event)
+            and _outside_window(c, start_date, end_date)
+        )
+    ]
+    # Fully non-recurring calendars (common for one-off feeds) can
+    # skip recurrence expansion entirely.
+    if not _has_recurrence(ical):
+        return list(_iter_plain_events(ical, start_date, end_date))
+
+    # recurring_ical_events yields exact icalendar.Event instances,
+    # so a pointer-identity check beats isinstance's MRO walk in
+    # the per-event loop.
+    _Event = icalendar.Event
+    events = recurring_ical_events.of(ical)
+    out = []
+    for event in events.between(start_date, end_date):
+        if type(event) is not _Event:
+            raise ValueError(
+                f"{event.get('SUMMARY')} is not an Event"
+            )
+        out.append(event)
+    return out
+
 
 @beartype
 class Downloader:
-    def __init__(self):
-        self.session = aiohttp.ClientSession()
-
-    async def fetch(self, url: str, fix_apple: bool = False):
-        async with self.session.get(url) as response:
+    def __init__(
+        self, session: aiohttp.ClientSession | None = None
+    ):
+        # Accept a shared session so calendar and image fetches can
+        # pool connections, DNS cache and TLS state.
+        self.session = session or aiohttp.ClientSession()
+        # (etag, last_modified) remembered per URL so unchanged
+        # feeds can answer with a cheap 304.
+        self._validators: dict[
+            str, tuple[str | None, str | None]
+        ] = {}
+        # URLs whose validators changed since the last persist.
+        self._dirty_validators: set[str] = set()
+
+    def prime_validators(
+        self,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        """Seed validators (e.g. from the database) for a URL."""
+        self._validators[url] = (etag, last_modified)
+
+    def get_validators(
+        self, url: str
+    ) -> tuple[str | None, str | None]:
+        return self._validators.get(url, (None, None))
+
+    def take_dirty_validators(self) -> set[str]:
+        dirty = self._dirty_validators
+        self._dirty_validators = set()
+        return dirty
+
+    async def fetch(
+        self, url: str, fix_apple: bool = False
+    ) -> str | None:
+        """Fetch a calendar body, or None if it is unchanged."""
+        etag, last_modified = self._validators.get(
+            url, (None, None)
+        )
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        async with self.session.get(
+            url, headers=headers
+        ) as response:
+            if response.status == 304:
+                return None
             if response.status != 200:
                 raise ConnectionError("Failed to fetch calendar data")
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self._validators[url] = (etag, last_modified)
+                self._dirty_validators.add(url)
             content_type = response.headers.get("Content-Type", "")
             try:
                 encoding = content_type.split("charset=")[1]
             except IndexError:
                 encoding = "utf-8"
 
-            content = await response.text(
-                encoding=encoding, errors="ignore"
-            )
-            content = content.replace("\r", "")
-
-            if fix_apple:
+            # Stream the body instead of buffering it twice via
+            # response.text().
+            buf = bytearray()
+            async for chunk in response.content.iter_chunked(
+                64 * 1024
+            ):
+                buf += chunk
+            # No CR stripping: ICS is CRLF-delimited per RFC 5545
+            # and icalendar accepts both endings, so rewriting the
+            # whole body here only cost a copy.
+            content = bytes(buf).decode(encoding, errors="ignore")
+
+            # The membership scan is much cheaper than replace()'s
+            # unconditional copy, and the broken offset is rare.
+            if fix_apple and _APPLE_TZ_BAD in content:
                 content = content.replace(
-                    "TZOFFSETFROM:+5328", "TZOFFSETFROM:+0053"
+                    _APPLE_TZ_BAD, _APPLE_TZ_GOOD
                 )
 
             return content
@@ -120,7 +333,7 @@ class DonetickFetcher:
 
         cutoff = datetime.datetime.now(
             datetime.UTC
-        ) + relativedelta(days=days_forward)
+        ) + datetime.timedelta(days=days_forward)
         tasks: list[DonetickTask] = []
 
         for chore in chores_data:
@@ -162,6 +375,101 @@ class Crawler:
     ):
         self.config = config
         self.downloader = downloader or Downloader()
+        # Raw ICS bodies by URL, reused when the feed reports 304.
+        self._body_cache: dict[str, str] = {}
+        # Parsing and recurrence expansion are pure-Python CPU work;
+        # run them in worker processes so the loop stays responsive.
+        # Spawn, not fork: by first submit this process is already
+        # multi-threaded (aiosqlite's connection thread), and forking
+        # a threaded process can deadlock the children.
+        self._pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Per-cycle memo of expansions keyed by (url, window), so a
+        # URL shared by several chats is fetched and expanded once
+        # per sync cycle. Cleared via reset_cycle_cache().
+        self._expand_memo: dict[
+            tuple[str, datetime.date, datetime.date],
+            asyncio.Task[list[icalendar.Event]],
+        ] = {}
+
+    def reset_cycle_cache(self) -> None:
+        """Invalidate memoized expansions; call once per sync cycle."""
+        self._expand_memo.clear()
+
+    def seed_http_cache(
+        self, entries: list[CalendarCacheEntry]
+    ) -> None:
+        """Restore persisted validators and bodies after a restart."""
+        for entry in entries:
+            self.downloader.prime_validators(
+                entry.url, entry.etag, entry.last_modified
+            )
+            self._body_cache[entry.url] = entry.body
+
+    def collect_http_cache(self) -> list[CalendarCacheEntry]:
+        """Drain cache entries that changed and should be persisted."""
+        entries = []
+        for url in self.downloader.take_dirty_validators():
+            body = self._body_cache.get(url)
+            if body is None:
+                continue
+            etag, last_modified = self.downloader.get_validators(
+                url
+            )
+            entries.append(
+                CalendarCacheEntry(
+                    url=url,
+                    etag=etag,
+                    last_modified=last_modified,
+                    body=body,
+                )
+            )
+        return entries
+
+    def _expand_cached(
+        self,
+        cal: Calendar,
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> "asyncio.Task[list[icalendar.Event]]":
+        key = (cal.url, start_date, end_date)
+        task = self._expand_memo.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._expand_calendar(cal, start_date, end_date)
+            )
+            self._expand_memo[key] = task
+        return task
+
+    async def _expand_calendar(
+        self,
+        cal: Calendar,
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> list[icalendar.Event]:
+        logger.info(f"Processing calendar: {cal.name}")
+
+        cal_data = await self.downloader.fetch(
+            cal.url, fix_apple=cal.icloud
+        )
+
+        if cal_data is None:
+            cal_data = self._body_cache.get(cal.url)
+            if cal_data is None:
+                logger.warning(
+                    f"Calendar {cal.name} reported unchanged "
+                    "but is not cached, skipping"
+                )
+                return []
+        else:
+            self._body_cache[cal.url] = cal_data
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, _expand_ics, cal_data, start_date, end_date
+        )
 
     async def process_calendars(
         self,
@@ -169,28 +477,34 @@ class Crawler:
     ) -> AsyncGenerator[icalendar.Event]:
         today = datetime.date.today()
         # Ensure date ranges are handled correctly regardless of +/- signs
-        start_date = today + relativedelta(days=self.config.date_range[0])
-        end_date = today + relativedelta(days=self.config.date_range[1])
-        
-        for cal in calendar_configs:
-            logger.info(f"Processing calendar: {cal.name}")
-
-            try:
-                cal_data = await self.downloader.fetch(
-                    cal.url, fix_apple=cal.icloud
+        # timedelta suffices for pure day offsets and is far cheaper
+        # than relativedelta.
+        start_date = today + datetime.timedelta(
+            days=self.config.date_range[0]
+        )
+        end_date = today + datetime.timedelta(
+            days=self.config.date_range[1]
+        )
+
+        # Overlap all expansions; fetches are pure I/O latency and
+        # shared URLs collapse onto the same memoized task.
+        results = await asyncio.gather(
+            *(
+                self._expand_cached(cal, start_date, end_date)
+                for cal in calendar_configs
+            ),
+            return_exceptions=True,
+        )
+
+        for cal, events in zip(calendar_configs, results):
+            if isinstance(events, BaseException):
+                logger.error(
+                    f"Error fetching calendar data: {events}"
                 )
-            except ConnectionError as e:
-                logger.error(f"Error fetching calendar data: {e}")
                 continue
-
-            ical = icalendar.Calendar.from_ical(cal_data)
-            events = recurring_ical_events.of(ical)
-            for event in events.between(start_date, end_date):
-                if not isinstance(event, icalendar.Event):
-                    raise ValueError(
-                        f"{event.get('SUMMARY')} is not an Event"
-                    )
+            for event in events:
                 yield event
 
     async def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
         await self.downloader.close()
@@ -1,8 +1,11 @@
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
 from sqlite3 import PARSE_DECLTYPES
 
 import aiosqlite
 
-from model import Calendar, TrackedMsg
+from model import Calendar, CalendarCacheEntry, TrackedMsg
 from typeutil import safe_must
 
 
@@ -10,10 +13,80 @@ class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn: aiosqlite.Connection | None = None
+        self._tx_lock = asyncio.Lock()
+        # Task-local, not a plain bool: only the task that opened
+        # the transaction may bypass the lock/commit in _write();
+        # any other task's writes must queue on _tx_lock.
+        self._in_transaction: contextvars.ContextVar[bool] = (
+            contextvars.ContextVar(
+                "db_in_transaction", default=False
+            )
+        )
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Group several operations into one transaction/fsync.
+
+        Writes issued inside the block skip their per-call commit;
+        everything lands in a single COMMIT (or rolls back
+        together). Transactions are serialized on a lock since all
+        work shares one connection.
+
+        Reads take no lock, so a read from another task may observe
+        this transaction's uncommitted state; current readers only
+        touch rows their own chat writes, so that is acceptable.
+        """
+        conn = safe_must(self.conn, "database connection")
+        async with self._tx_lock:
+            await conn.execute("BEGIN IMMEDIATE")
+            token = self._in_transaction.set(True)
+            try:
+                yield
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                await conn.commit()
+            finally:
+                self._in_transaction.reset(token)
+
+    @asynccontextmanager
+    async def _write(self):
+        """Serialize one write (plus its commit) with transactions.
+
+        Every write shares the connection, so an unlocked write's
+        implicit transaction or commit could interleave with an open
+        transaction() block. Inside this task's transaction the
+        caller already holds the lock and the block commits;
+        otherwise take the lock and commit here.
+        """
+        conn = safe_must(self.conn, "database connection")
+        if self._in_transaction.get():
+            yield conn
+            return
+        async with self._tx_lock:
+            yield conn
+            await conn.commit()
 
     async def connect(self):
-        self.conn = await aiosqlite.connect(self.db_path, detect_types=PARSE_DECLTYPES)
+        # A larger statement cache keeps the per-method SQL strings
+        # prepared across calls instead of re-parsing them.
+        self.conn = await aiosqlite.connect(
+            self.db_path,
+            detect_types=PARSE_DECLTYPES,
+            cached_statements=256,
+        )
         await self.conn.execute("PRAGMA foreign_keys = ON;")
+        # WAL + NORMAL cuts the fsyncs per commit and lets readers
+        # run alongside writers; the rest sizes caches generously
+        # for a database this small.
+        await self.conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA cache_size = -20000;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA mmap_size = 268435456;
+        """)
         await self._init_db()
 
     async def close(self):
@@ -34,6 +107,7 @@ class Database:
             pinned BOOLEAN NOT NULL DEFAULT 0,
             create_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
             update_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            content_hash BLOB,
             UNIQUE(chat_id, message_id)
         );
         CREATE TABLE IF NOT EXISTS calendars (
@@ -46,10 +120,30 @@ class Database:
             color TEXT,
             UNIQUE(chat_id, name)
         );
+        CREATE TABLE IF NOT EXISTS calendar_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body TEXT NOT NULL
+        );
         """)
         await self._migrate_calendars_type_constraint()
+        await self._migrate_tracked_messages_content_hash()
         await conn.commit()
 
+    async def _migrate_tracked_messages_content_hash(self):
+        conn = safe_must(self.conn, "database connection")
+        cursor = await conn.execute(
+            "PRAGMA table_info(tracked_messages)"
+        )
+        rows = await cursor.fetchall()
+        await cursor.close()
+        if any(row[1] == "content_hash" for row in rows):
+            return
+        await conn.execute(
+            "ALTER TABLE tracked_messages ADD COLUMN content_hash BLOB"
+        )
+
     async def _migrate_calendars_type_constraint(self):
         conn = safe_must(self.conn, "database connection")
         cursor = await conn.execute(
@@ -88,14 +182,13 @@ class Database:
         """)
 
     async def touch_chat(self, chat_id: int) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            INSERT OR IGNORE INTO chats (id) VALUES (?)
-            """,
-            (chat_id,),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                INSERT OR IGNORE INTO chats (id) VALUES (?)
+                """,
+                (chat_id,),
+            )
 
     async def list_all_chats(self) -> list[int]:
         conn = safe_must(self.conn, "database connection")
@@ -133,100 +226,160 @@ class Database:
         self, chat_id: int, calendar: Calendar
     ) -> None:
         """Add a calendar for a chat using a CalendarConfig object."""
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            INSERT OR IGNORE INTO calendars (chat_id, type, url, name, color, icloud)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                chat_id,
-                calendar.type,
-                calendar.url,
-                calendar.name,
-                calendar.color,
-                int(calendar.icloud)
-                if calendar.icloud is not None
-                else 0,
-            ),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                INSERT OR IGNORE INTO calendars (chat_id, type, url, name, color, icloud)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    chat_id,
+                    calendar.type,
+                    calendar.url,
+                    calendar.name,
+                    calendar.color,
+                    int(calendar.icloud)
+                    if calendar.icloud is not None
+                    else 0,
+                ),
+            )
+
+    async def add_calendars(
+        self, chat_id: int, calendars: list[Calendar]
+    ) -> None:
+        """Add several calendars in one statement and one commit."""
+        async with self._write() as conn:
+            await conn.executemany(
+                """
+                INSERT OR IGNORE INTO calendars (chat_id, type, url, name, color, icloud)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        chat_id,
+                        calendar.type,
+                        calendar.url,
+                        calendar.name,
+                        calendar.color,
+                        int(calendar.icloud)
+                        if calendar.icloud is not None
+                        else 0,
+                    )
+                    for calendar in calendars
+                ],
+            )
 
     async def delete_calendar(self, chat_id: int, name: str) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            DELETE FROM calendars
-            WHERE chat_id = ? AND name = ?
-            """,
-            (chat_id, name),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                DELETE FROM calendars
+                WHERE chat_id = ? AND name = ?
+                """,
+                (chat_id, name),
+            )
 
     async def clear_calendars_for_chat(self, chat_id: int) -> None:
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                DELETE FROM calendars
+                WHERE chat_id = ?
+                """,
+                (chat_id,),
+            )
+
+    async def get_calendar_cache(self) -> list[CalendarCacheEntry]:
         conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            DELETE FROM calendars
-            WHERE chat_id = ?
-            """,
-            (chat_id,),
+        cursor = await conn.execute(
+            "SELECT url, etag, last_modified, body FROM calendar_cache"
         )
-        await conn.commit()
+        rows = await cursor.fetchall()
+        await cursor.close()
+        return [
+            CalendarCacheEntry(
+                url=row[0],
+                etag=row[1],
+                last_modified=row[2],
+                body=row[3],
+            )
+            for row in rows
+        ]
+
+    async def set_calendar_caches(
+        self, entries: list[CalendarCacheEntry]
+    ) -> None:
+        if not entries:
+            return
+        async with self._write() as conn:
+            await conn.executemany(
+                """
+                INSERT OR REPLACE INTO calendar_cache (url, etag, last_modified, body)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (e.url, e.etag, e.last_modified, e.body)
+                    for e in entries
+                ],
+            )
 
     async def add_tracked_message(
-        self, chat_id: int, message_id: int, pinned: bool = False
+        self,
+        chat_id: int,
+        message_id: int,
+        pinned: bool = False,
+        content_hash: bytes | None = None,
     ) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            INSERT OR IGNORE INTO tracked_messages (chat_id, message_id, pinned)
-            VALUES (?, ?, ?)
-            """,
-            (chat_id, message_id, int(pinned)),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                INSERT OR IGNORE INTO tracked_messages (chat_id, message_id, pinned, content_hash)
+                VALUES (?, ?, ?, ?)
+                """,
+                (chat_id, message_id, int(pinned), content_hash),
+            )
 
     async def pin_message(
         self, chat_id: int, message_id: int, pinned: bool = True
     ) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            UPDATE tracked_messages
-            SET pinned = ?
-            WHERE chat_id = ? AND message_id = ?
-            """,
-            (int(pinned), chat_id, message_id),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                UPDATE tracked_messages
+                SET pinned = ?
+                WHERE chat_id = ? AND message_id = ?
+                """,
+                (int(pinned), chat_id, message_id),
+            )
 
     async def update_message(
-        self, chat_id: int, message_id: int
+        self,
+        chat_id: int,
+        message_id: int,
+        content_hash: bytes | None = None,
     ) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            UPDATE tracked_messages
-            SET update_time = CURRENT_TIMESTAMP
-            WHERE chat_id = ? AND message_id = ?
-            """,
-            (chat_id, message_id),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                UPDATE tracked_messages
+                SET update_time = CURRENT_TIMESTAMP,
+                    content_hash = COALESCE(?, content_hash)
+                WHERE chat_id = ? AND message_id = ?
+                """,
+                (content_hash, chat_id, message_id),
+            )
 
     async def delete_message(
         self, chat_id: int, message_id: int
     ) -> None:
-        conn = safe_must(self.conn, "database connection")
-        await conn.execute(
-            """
-            DELETE FROM tracked_messages
-            WHERE chat_id = ? AND message_id = ?
-            """,
-            (chat_id, message_id),
-        )
-        await conn.commit()
+        async with self._write() as conn:
+            await conn.execute(
+                """
+                DELETE FROM tracked_messages
+                WHERE chat_id = ? AND message_id = ?
+                """,
+                (chat_id, message_id),
+            )
 
     async def get_latest_tracked_message(
         self, chat_id: int
@@ -234,7 +387,7 @@ class Database:
         conn = safe_must(self.conn, "database connection")
         cursor = await conn.execute(
             """
-            SELECT chat_id, message_id, pinned, create_time, update_time
+            SELECT chat_id, message_id, pinned, create_time, update_time, content_hash
             FROM tracked_messages
             WHERE chat_id = ?
             ORDER BY create_time DESC
@@ -251,6 +404,7 @@ class Database:
                 pinned=bool(row[2]),
                 create_time=row[3],
                 update_time=row[4],
+                content_hash=row[5],
             )
         return None
 
@@ -260,7 +414,7 @@ class Database:
         conn = safe_must(self.conn, "database connection")
         cursor = await conn.execute(
             """
-            SELECT chat_id, message_id, pinned, create_time, update_time
+            SELECT chat_id, message_id, pinned, create_time, update_time, content_hash
             FROM tracked_messages
             WHERE chat_id = ?
             ORDER BY create_time DESC
@@ -276,6 +430,7 @@ class Database:
                 pinned=bool(row[2]),
                 create_time=row[3],
                 update_time=row[4],
+                content_hash=row[5],
             )
             for row in rows
         ]
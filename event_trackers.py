@@ -1,15 +1,13 @@
 # event_trackers.py
 
 import abc
-import dataclasses
 import datetime
-import json
 import logging
 import zoneinfo
-from typing import Self, cast, override
+from collections import defaultdict
+from typing import Self, override
 
 import icalendar
-from beartype import beartype
 from dateutil.parser import isoparse
 from dateutil.relativedelta import relativedelta
 
@@ -17,6 +15,7 @@ from config import MarkdownFormatConfig
 from model import DisplayEvent, TaskLike
 
 EventType = icalendar.Event
+_vDDDTypes = icalendar.vDDDTypes
 logger = logging.getLogger(__name__)
 
 
@@ -35,7 +34,6 @@ class EventTracker(abc.ABC):
         ...
 
 
-@beartype
 def vdd_to_datetime(
     dt: datetime.datetime
     | datetime.date
@@ -50,7 +48,8 @@ def vdd_to_datetime(
         return None
 
 
-@beartype
+# No @beartype: track_event/track_task run once per event and the
+# per-call type introspection is the dominant overhead there.
 class MDTracker(EventTracker):
     def __init__(self, cfg: MarkdownFormatConfig, timezone: str = "UTC"):
         self.events: list[DisplayEvent] = []
@@ -72,13 +71,16 @@ class MDTracker(EventTracker):
 
     @override
     def track_event(self, event: EventType) -> Self:
-        dtstart = event.get("DTSTART")
-        dtend = event.get("DTEND")
-        title = str(event.get("SUMMARY", ""))
-
-        if not isinstance(dtstart, icalendar.vDDDTypes):
+        # Bind the property-bag getter once; every .get walks the
+        # icalendar Component mapping and this runs per event.
+        eget = event.get
+        dtstart = eget("DTSTART")
+        dtend = eget("DTEND")
+        title = str(eget("SUMMARY", ""))
+
+        if type(dtstart) is not _vDDDTypes:
             raise TypeError(f"DTSTART of {title} is not a vDDDTypes")
-        if not isinstance(dtend, icalendar.vDDDTypes):
+        if type(dtend) is not _vDDDTypes:
             raise TypeError(f"DTEND of {title} is not a vDDDTypes")
 
         start_dt = vdd_to_datetime(dtstart.dt)
@@ -94,8 +96,6 @@ class MDTracker(EventTracker):
         final_start = self._normalize_datetime(start_dt)
         final_end = self._normalize_datetime(end_dt)
 
-        print(title, final_start, final_end, all_day)
-
         self.events.append(
             DisplayEvent(start=final_start, end=final_end, title=title, all_day=all_day)
         )
@@ -128,48 +128,73 @@ class MDTracker(EventTracker):
         return self
 
     def generate_markdown(self) -> str:
+        # strftime re-parses its format string on every call; hoist
+        # the formats and memoize per distinct timestamp (tasks and
+        # recurring events repeat the same times a lot).
+        dfmt = self.cfg.date_format
+        tfmt = self.cfg.time_format
+        due_fmt = f"{dfmt} {tfmt}"
+        time_cache: dict[datetime.datetime, str] = {}
+
+        def fmt_time(dt: datetime.datetime) -> str:
+            s = time_cache.get(dt)
+            if s is None:
+                s = time_cache[dt] = dt.strftime(tfmt)
+            return s
+
         overdue_tasks = sorted(
             [e for e in self.events if e.overdue], key=lambda e: e.start
         )
-        scheduled_events = [e for e in self.events if not e.overdue]
+        # One global sort; the per-date buckets below then come out
+        # pre-ordered and never need sorting again.
+        scheduled_events = sorted(
+            [e for e in self.events if not e.overdue],
+            key=lambda e: e.start,
+        )
 
-        markdown = []
+        # Each block is joined with "\n" and blocks with "\n\n",
+        # which gives the separating blank lines without appending
+        # empty strings between sections.
+        blocks = []
 
         # Process Overdue Tasks
         if overdue_tasks:
-            markdown.append(self.cfg.overdue_title)
+            lines = [self.cfg.overdue_title]
             for task in overdue_tasks:
-                due_str = task.start.strftime(f"{self.cfg.date_format} {self.cfg.time_format}")
-                markdown.append(f"*Due {due_str}*: {task.title}")
-            markdown.append("") # Add a blank line for separation
+                due_str = task.start.strftime(due_fmt)
+                lines.append(f"*Due {due_str}*: {task.title}")
+            blocks.append("\n".join(lines))
 
         # Process Scheduled Events
-        date_maps: dict[datetime.date, list[DisplayEvent]] = {}
+        date_maps: defaultdict[datetime.date, list[DisplayEvent]] = (
+            defaultdict(list)
+        )
         for event in scheduled_events:
-            date = event.start.date()
-            if date not in date_maps:
-                date_maps[date] = []
-            date_maps[date].append(event)
-
-        for date, events in sorted(date_maps.items()):
-            date_str = date.strftime(self.cfg.date_format)
-            all_day = [event for event in events if event.all_day]
-            timed = sorted([event for event in events if not event.all_day], key=lambda e: e.start)
-
-            markdown.append(f"**{date_str}**")
+            date_maps[event.start.date()].append(event)
+
+        # Insertion order already follows the global sort above.
+        for date, events in date_maps.items():
+            date_str = date.strftime(dfmt)
+            # Partition in one pass instead of two comprehensions.
+            all_day: list[DisplayEvent] = []
+            timed: list[DisplayEvent] = []
+            for event in events:
+                (all_day if event.all_day else timed).append(event)
+
+            lines = [f"**{date_str}**"]
             for event in all_day:
-                markdown.append(f"*All day*: {event.title}")
+                lines.append(f"*All day*: {event.title}")
             for event in timed:
-                start = event.start.strftime(self.cfg.time_format)
+                start = fmt_time(event.start)
                 # For tasks, start and end are the same
                 if event.start == event.end:
-                    markdown.append(f"*{start}*: {event.title}")
+                    lines.append(f"*{start}*: {event.title}")
                 else:
-                    end = event.end.strftime(self.cfg.time_format)
-                    markdown.append(f"*{start} - {end}*: {event.title}")
-            markdown.append("")
+                    end = fmt_time(event.end)
+                    lines.append(f"*{start} - {end}*: {event.title}")
+            blocks.append("\n".join(lines))
 
-        return "\n".join(markdown)
+        return "\n\n".join(blocks)
 
     @override
     def clear(self) -> Self:
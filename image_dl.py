@@ -9,16 +9,26 @@ logger = logging.getLogger(__name__)
 
 @beartype
 class ImageDownloader:
-    def __init__(self, image_urls: dict[str, str], tcp_config: dict | None = None):
-        self.connector = aiohttp.TCPConnector(**(tcp_config or {}))
-        self.session = aiohttp.ClientSession(connector=self.connector)
+    def __init__(
+        self,
+        image_urls: dict[str, str],
+        tcp_config: dict | None = None,
+        session: aiohttp.ClientSession | None = None,
+    ):
+        if session is None:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**(tcp_config or {}))
+            )
+        self.session = session
         self.image_urls = image_urls
 
     async def fetch(self, name: str):
         url = self.image_urls.get(name)
         if not url:
             raise ValueError(f"No image URL configured for {name}")
-        async with self.session.get(url) as response:
+        # ssl=False carries over the old image-only tcp_config
+        # behavior without weakening the rest of the shared session.
+        async with self.session.get(url, ssl=False) as response:
             if response.status != 200:
                 raise ConnectionError("Failed to fetch image")
             return await response.read()
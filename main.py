@@ -3,20 +3,24 @@
 import argparse
 import asyncio
 import datetime
+import hashlib
 import locale
 import logging
+import math
 import signal
 import zoneinfo
 
+import aiohttp
 from beartype import beartype
 from beartype.typing import Callable
 from telegram import Bot, Update
-from telegram.error import TelegramError
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import (
     Application,
     ApplicationBuilder,
     CommandHandler,
     ContextTypes,
+    filters,
 )
 
 from config import Config
@@ -26,6 +30,11 @@ from event_trackers import MDTracker
 from image_dl import ImageDownloader
 from typeutil import must, safe_must
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 logging.basicConfig(
     style="{", format="{levelname:8s} [{asctime}] {name}: {message}"
 )
@@ -40,10 +49,37 @@ class BackgroundTaskManager:
     def __init__(self):
         self.tasks = set()
 
-    def run(self, coro: Callable, *args, **kwargs):
+    def run(
+        self, coro: Callable, *args, restart: bool = False, **kwargs
+    ):
+        # restart=True is for long-lived loops that must outlive any
+        # crash (the periodic sync). One-shot tasks stay one-shot: a
+        # deterministic failure would otherwise retry in a tight
+        # loop with no backoff.
         task = asyncio.create_task(coro(*args, **kwargs))
         self.tasks.add(task)
-        task.add_done_callback(self.tasks.discard)
+        task.add_done_callback(
+            lambda t: self._on_done(t, coro, args, kwargs, restart)
+        )
+
+    def _on_done(
+        self, task, coro: Callable, args, kwargs, restart: bool
+    ):
+        # Surface crashes instead of letting them sit unobserved on
+        # the task.
+        self.tasks.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is None:
+            return
+        logger.error(
+            f"Background task {getattr(coro, '__name__', coro)!s} "
+            f"crashed{', restarting' if restart else ''}",
+            exc_info=exc,
+        )
+        if restart:
+            self.run(coro, *args, restart=True, **kwargs)
 
     def cancel_tasks(self):
         for task in self.tasks:
@@ -51,16 +87,26 @@ class BackgroundTaskManager:
         self.tasks.clear()
 
 
-@beartype
+# No @beartype: periodic and BotManager's methods run per chat per
+# cycle, and the per-call introspection adds up; boundary
+# constructors (Config, Calendar) keep their checks.
 async def periodic(
     interval: int | float, fn: Callable, *args, **kwargs
 ):
+    # Schedule against the monotonic clock so a slow fn does not
+    # stretch the period, and survive fn raising so the loop never
+    # dies silently.
+    loop = asyncio.get_running_loop()
+    next_t = loop.time()
     while True:
-        await fn(*args, **kwargs)
-        await asyncio.sleep(interval)
+        next_t += interval
+        try:
+            await fn(*args, **kwargs)
+        except Exception:
+            logger.exception("Periodic task failed")
+        await asyncio.sleep(max(0.0, next_t - loop.time()))
 
 
-@beartype
 class BotManager:
     def __init__(
         self,
@@ -82,49 +128,102 @@ class BotManager:
         self.donetick = donetick
         self.idl = idl
         self.bg = bg or BackgroundTaskManager()
+        # Bound the sync_full fan-out so a large chat list cannot
+        # exhaust sockets or the Telegram rate budget.
+        self._sync_sem = asyncio.Semaphore(
+            config.crawler.max_concurrent_syncs
+        )
+        # Pending debounced syncs by chat id.
+        self._sync_debounce: dict[int, asyncio.TimerHandle] = {}
+
+    def _schedule_sync(self, chat_id: int, delay_s: float = 2.0):
+        """Schedule a sync for a chat, coalescing rapid triggers.
+
+        Another call within the window resets the timer, so e.g. a
+        burst of add_calendar_group commands ends in one sync.
+        """
+        pending = self._sync_debounce.pop(chat_id, None)
+        if pending is not None:
+            pending.cancel()
+
+        def fire():
+            self._sync_debounce.pop(chat_id, None)
+            self.bg.run(self.sync_chat, chat_id)
+
+        loop = asyncio.get_running_loop()
+        self._sync_debounce[chat_id] = loop.call_later(
+            delay_s, fire
+        )
 
-    async def update_message(self, chat_id: int, message: str):
+    async def update_message(
+        self, chat_id: int, message: str, suffix: str = ""
+    ):
+        # The suffix (e.g. the per-cycle "Last updated" stamp) is
+        # sent but excluded from the content hash, so a new stamp
+        # alone never forces an edit.
         bot: Bot = must(self.app).bot
-        latest_pinned = await self.db.get_latest_tracked_message(
-            chat_id
-        )
-        if latest_pinned:
-            age = datetime.datetime.now() - latest_pinned.create_time
-            if age > OLD_MESSAGE_CUTOFF:
-                await self.db.delete_message(
-                    chat_id, latest_pinned.message_id
+        content_hash = hashlib.blake2b(
+            message.encode(), digest_size=16
+        ).digest()
+        full_message = message + suffix
+        # One transaction covers the read-then-expire sequence, so
+        # the row cannot vanish between the read and the delete and
+        # both land in a single commit.
+        async with self.db.transaction():
+            latest_pinned = (
+                await self.db.get_latest_tracked_message(chat_id)
+            )
+            if latest_pinned:
+                age = (
+                    datetime.datetime.now()
+                    - latest_pinned.create_time
                 )
-            else:
-                try:
-                    try:
-                        await bot.edit_message_text(
-                            chat_id=chat_id,
-                            message_id=latest_pinned.message_id,
-                            text=message,
-                            parse_mode="Markdown",
-                        )
-                    except TelegramError as e:
-                        if "exactly the same" in e.message:
-                            logger.info(
-                                f"Message in chat {chat_id} is exactly the same, skipping update."
-                            )
-                        else:
-                            raise
-                    await self.db.update_message(
-                        chat_id, latest_pinned.message_id
-                    )
-                    return
-                except Exception as e:
-                    logger.error(
-                        f"Failed to update message in chat {chat_id}: {e}"
-                    )
+                if age > OLD_MESSAGE_CUTOFF:
                     await self.db.delete_message(
                         chat_id, latest_pinned.message_id
                     )
                     latest_pinned = None
+        if latest_pinned:
+            if latest_pinned.content_hash == content_hash:
+                # Unchanged content; skip the edit round-trip
+                # entirely.
+                logger.info(
+                    f"Message in chat {chat_id} is unchanged, skipping update."
+                )
+                return
+            try:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=latest_pinned.message_id,
+                    text=full_message,
+                    parse_mode="Markdown",
+                )
+                await self.db.update_message(
+                    chat_id,
+                    latest_pinned.message_id,
+                    content_hash,
+                )
+                return
+            except BadRequest as e:
+                # The tracked message is gone or unusable; forget
+                # it and fall through to send a fresh one.
+                logger.warning(
+                    f"Replacing message in chat {chat_id}: {e}"
+                )
+                await self.db.delete_message(
+                    chat_id, latest_pinned.message_id
+                )
+            except TelegramError as e:
+                # Transient (network/rate) failure: keep the
+                # tracked message and retry on the next cycle
+                # instead of orphaning a pinned message.
+                logger.error(
+                    f"Failed to update message in chat {chat_id}: {e}"
+                )
+                return
         msg = await bot.send_message(
             chat_id=chat_id,
-            text=message,
+            text=full_message,
             parse_mode="Markdown",
             disable_notification=True,
         )
@@ -139,10 +238,25 @@ class BotManager:
                 f"Failed to pin message in chat {chat_id}: {e}"
             )
         await self.db.add_tracked_message(
-            chat_id, msg.message_id, pinned=pinned
+            chat_id,
+            msg.message_id,
+            pinned=pinned,
+            content_hash=content_hash,
         )
 
-    async def sync_chat(self, chat_id: int):
+    def _now_str(self) -> str:
+        # Make the "Last updated" timestamp timezone-aware
+        try:
+            tz = zoneinfo.ZoneInfo(self.outer_config.timezone)
+        except zoneinfo.ZoneInfoNotFoundError:
+            tz = zoneinfo.ZoneInfo("UTC")
+        return datetime.datetime.now(tz).strftime(
+            "%Y-%m-%d %H:%M:%S %Z"
+        )
+
+    async def sync_chat(
+        self, chat_id: int, now_str: str | None = None
+    ):
         # Pass the configured timezone string to the tracker
         tracker = MDTracker(
             self.crawler.config.markdown, self.outer_config.timezone
@@ -177,20 +291,38 @@ class BotManager:
         if not message.strip():
             message = "No upcoming events or tasks."
 
-        # Make the "Last updated" timestamp timezone-aware
-        try:
-            tz = zoneinfo.ZoneInfo(self.outer_config.timezone)
-        except zoneinfo.ZoneInfoNotFoundError:
-            tz = zoneinfo.ZoneInfo("UTC")
-            
-        now_str = datetime.datetime.now(tz).strftime('%Y-%m-%d %H:%M:%S %Z')
+        if now_str is None:
+            now_str = self._now_str()
         message_suffix = f"\n_Last updated on {now_str}_"
-        await self.update_message(chat_id, message + message_suffix)
+        await self.update_message(chat_id, message, message_suffix)
     
     async def sync_full(self):
+        # Fresh expansions once per cycle; chats sharing a calendar
+        # URL then reuse the same fetch+parse inside the cycle.
+        self.crawler.reset_cycle_cache()
         chat_ids = await self.db.list_all_chats()
-        await asyncio.gather(
-            *[self.sync_chat(chat_id) for chat_id in chat_ids]
+        # One timestamp (and tz lookup) per cycle, shared by every
+        # chat's suffix.
+        now_str = self._now_str()
+
+        async def bounded_sync(chat_id: int):
+            async with self._sync_sem:
+                await self.sync_chat(chat_id, now_str)
+
+        results = await asyncio.gather(
+            *[bounded_sync(chat_id) for chat_id in chat_ids],
+            return_exceptions=True,
+        )
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    f"Failed to sync chat {chat_id}: {result}"
+                )
+
+        # Persist refreshed validators/bodies so feeds that have
+        # not changed stay cheap across restarts too.
+        await self.db.set_calendar_caches(
+            self.crawler.collect_http_cache()
         )
 
     # ... (the rest of the command handlers remain the same)
@@ -215,16 +347,6 @@ class BotManager:
                 update.effective_chat, "update.effective_chat"
             )
 
-            if not (
-                chat.id in self.config.chat_ids
-                or str(chat.id) in self.config.chat_ids
-            ):
-                await context.bot.send_message(
-                    chat_id=chat.id,
-                    text="You are not authorized to use this command.",
-                )
-                return
-
             try:
                 image_data = await self.idl.fetch(name)
                 if image_data:
@@ -254,16 +376,6 @@ class BotManager:
     ):
         chat = safe_must(update.effective_chat, "update.effective_chat")
 
-        if not (
-            chat.id in self.config.chat_ids
-            or str(chat.id) in self.config.chat_ids
-        ):
-            await context.bot.send_message(
-                chat_id=chat.id,
-                text="You are not authorized to add calendar groups.",
-            )
-            return
-
         if not context.args or len(context.args) < 1:
             await context.bot.send_message(
                 chat_id=chat.id,
@@ -283,31 +395,20 @@ class BotManager:
             return
 
         calendars = self.calendar_groups[group_name]
-        for cal in calendars:
-            await self.db.add_calendar(chat.id, cal)
+        await self.db.add_calendars(chat.id, calendars)
 
         await context.bot.send_message(
             chat_id=chat.id,
             text=f"Added calendar group '{group_name}' with {len(calendars)} calendars.",
         )
 
-        await self.sync_chat(chat.id)
+        self._schedule_sync(chat.id)
 
     async def command_clear_group(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
         chat = safe_must(update.effective_chat, "update.effective_chat")
 
-        if not (
-            chat.id in self.config.chat_ids
-            or str(chat.id) in self.config.chat_ids
-        ):
-            await context.bot.send_message(
-                chat_id=chat.id,
-                text="You are not authorized to clear calendar groups.",
-            )
-            return
-
         await self.db.clear_calendars_for_chat(chat.id)
 
         await context.bot.send_message(
@@ -329,6 +430,9 @@ class BotManager:
         self.app = (
             ApplicationBuilder().token(self.config.api_token).build()
         )
+        # Authorization lives in the handler filter: updates from
+        # other chats are dropped before the callbacks run.
+        authorized = filters.Chat(chat_id=self.config.chat_ids)
         self.app.add_handlers(
             [
                 CommandHandler("start", self.command_start),
@@ -336,32 +440,59 @@ class BotManager:
                 CommandHandler(
                     "add_calendar_group",
                     self.command_add_calendar_group,
+                    filters=authorized,
                 ),
                 CommandHandler(
-                    "clear_calendars", self.command_clear_group
+                    "clear_calendars",
+                    self.command_clear_group,
+                    filters=authorized,
                 ),
             ]
         )
         self.app.add_handlers(
             [
-                CommandHandler(name, self.meta_command_image(name))
+                CommandHandler(
+                    name,
+                    self.meta_command_image(name),
+                    filters=authorized,
+                )
                 for name in self.outer_config.image_urls.keys()
             ]
         )
 
     async def start(self):
         await self.db.connect()
+        self.crawler.seed_http_cache(
+            await self.db.get_calendar_cache()
+        )
 
         app = must(self.app)
         await app.initialize()
         await app.start()
-        await must(app.updater).start_polling()
+        # Long-poll getUpdates (timeout=30) with no artificial gap
+        # between polls, and only ask for the message updates the
+        # command handlers consume.
+        # drop_pending_updates skips replaying commands queued while
+        # the bot was down; the next sync cycle supersedes them all
+        # anyway.
+        await must(app.updater).start_polling(
+            poll_interval=0.0,
+            timeout=30,
+            allowed_updates=["message"],
+            drop_pending_updates=True,
+        )
 
         self.bg.run(
-            periodic, self.crawler.config.crawl_every, self.sync_full
+            periodic,
+            self.crawler.config.crawl_every,
+            self.sync_full,
+            restart=True,
         )
 
     async def stop(self):
+        for handle in self._sync_debounce.values():
+            handle.cancel()
+        self._sync_debounce.clear()
         self.bg.cancel_tasks()
 
         app = must(self.app)
@@ -398,13 +529,21 @@ async def main():
             )
 
     db = Database(config.db_path)
-    downloader = Downloader()
+    # One shared session so every fetcher pools connections, DNS
+    # cache and TLS state. Image fetches opt out of certificate
+    # verification per request; everything else verifies normally.
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=8,
+            ttl_dns_cache=300,
+        )
+    )
+    downloader = Downloader(session)
     crawler = Crawler(config.crawler, downloader)
     vikunja = VikunjaFetcher(config.vikunja, downloader)
     donetick = DonetickFetcher(config.donetick, downloader)
-    idl = ImageDownloader(
-        config.image_urls, tcp_config={"verify_ssl": False}
-    )
+    idl = ImageDownloader(config.image_urls, session=session)
 
     telegram = BotManager(
         config,
@@ -416,23 +555,27 @@ async def main():
     )
     telegram.prepare()
 
-    stop_event = asyncio.Event()
-
-    def handle_signal():
-        stop_event.set()
-
+    # Signals cancel the main task directly; shutdown runs in the
+    # finally block whether we were cancelled or crashed.
+    main_task = safe_must(asyncio.current_task(), "main task")
     loop = asyncio.get_running_loop()
     for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, handle_signal)
-
-    await telegram.start()
-    print("Bot is running. Press Ctrl+C to stop.")
-    await stop_event.wait()
-    print("Shutting down...")
+        loop.add_signal_handler(sig, main_task.cancel)
 
-    await telegram.stop()
-    await idl.close()
+    try:
+        await telegram.start()
+        print("Bot is running. Press Ctrl+C to stop.")
+        await asyncio.sleep(math.inf)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        print("Shutting down...")
+        await telegram.stop()
+        await idl.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        asyncio.run(main(), loop_factory=uvloop.new_event_loop)
+    else:
+        asyncio.run(main())
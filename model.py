@@ -8,43 +8,50 @@ from beartype import beartype, typing
 
 
 @beartype
+@dataclasses.dataclass(slots=True, frozen=True)
 class Calendar:
-    def __init__(
-        self,
-        type: str,
-        url: str,
-        name: str,
-        color: str,
-        icloud: bool | None = None,
-    ):
-        if type not in ["ical", "vikunja", "donetick"]:
-            raise ValueError(f"Unsupported calendar type: {type}")
-        if type == "ical" and not url:
+    type: str
+    url: str
+    name: str
+    color: str
+    icloud: bool = False
+
+    def __post_init__(self):
+        if self.type not in ["ical", "vikunja", "donetick"]:
+            raise ValueError(
+                f"Unsupported calendar type: {self.type}"
+            )
+        if self.type == "ical" and not self.url:
             raise ValueError("ical type requires a url")
-        self.type = type
-        self.url = url
-        self.name = name
-        self.color = color
-        self.icloud = icloud or False
+
+    # The same calendar entry often appears in several groups;
+    # memoize so each distinct one is constructed (and validated)
+    # only once.
+    _from_dict_cache: typing.ClassVar[dict[tuple, "Calendar"]] = {}
 
     @classmethod
     def from_dict(cls, data: dict):
-        return cls(
-            type=data["type"],
-            name=data["name"],
-            url=data.get("url", ""),
-            color=data.get("color", "#cccccc"),
-            icloud=data.get("icloud"),
+        key = (
+            data["type"],
+            data.get("url", ""),
+            data["name"],
+            data.get("color", "#cccccc"),
+            data.get("icloud") or False,
         )
+        cached = cls._from_dict_cache.get(key)
+        if cached is None:
+            cached = cls._from_dict_cache[key] = cls(*key)
+        return cached
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True, frozen=True)
 class TrackedMsg:
     chat_id: int
     message_id: int
     pinned: bool
     create_time: datetime
     update_time: datetime
+    content_hash: bytes | None = None
 
 
 @beartype
@@ -83,7 +90,17 @@ class TaskLike(Protocol):
 
 
 @beartype
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
+class CalendarCacheEntry:
+    url: str
+    etag: str | None
+    last_modified: str | None
+    body: str
+
+
+# No @beartype here: DisplayEvent is constructed once per tracked
+# event, and the wrapper's runtime checks dominate that hot path.
+@dataclasses.dataclass(slots=True)
 class DisplayEvent:
     start: datetime
     end: datetime
@@ -1,17 +1,28 @@
+from typing import NoReturn
+
+
 def must[T](x: T | None) -> T:
     return x  # type: ignore
 
 
+def _raise_must(
+    entity_name: str | None, message: str | None
+) -> NoReturn:
+    if message is None:
+        if entity_name is not None:
+            message = f"Expected {entity_name} to be not None"
+        else:
+            message = "Expected value to be not None"
+    raise ValueError(message)
+
+
 def safe_must[T](
     x: T | None,
     entity_name: str | None = None,
     message: str | None = None,
 ) -> T:
-    if x is None:
-        if message is None:
-            if entity_name is not None:
-                message = f"Expected {entity_name} to be not None"
-            else:
-                message = "Expected value to be not None"
-        raise ValueError(message)
-    return x
+    # Success path does no string work; all formatting lives in the
+    # cold raise helper.
+    if x is not None:
+        return x
+    _raise_must(entity_name, message)